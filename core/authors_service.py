@@ -5,7 +5,7 @@ from typing import Dict, List, Optional, Tuple
 
 from .config import DATABASE
 from .logging_utils import safe_log
-from .typesense_client import multi_search_request
+from .typesense_client import multi_search_request, character_id_filter, search_id_chunks
 from .bots import normalize_avatar_url
 
 
@@ -250,23 +250,19 @@ def fetch_typesense_bot_details_by_ids(bot_ids: List[str]) -> Dict[str, dict]:
     Fetch static fields for bot_ids from public_characters_alias.
     Returns dict keyed by bot_id.
     """
-    bot_ids = [str(x) for x in bot_ids if x]
+    bot_ids = list(dict.fromkeys(str(x) for x in bot_ids if x))
     if not bot_ids:
         return {}
 
     out: Dict[str, dict] = {}
-    CHUNK = 80
-
-    for i in range(0, len(bot_ids), CHUNK):
-        chunk = bot_ids[i:i + CHUNK]
-        ids_json = json.dumps(chunk)
 
-        payload = {
+    def build_payload(chunk: List[str]) -> dict:
+        return {
             "searches": [{
                 "collection": "public_characters_alias",
                 "q": "*",
                 "query_by": "character_id",
-                "filter_by": f"character_id:={ids_json}",
+                "filter_by": character_id_filter(chunk),
                 "include_fields": "character_id,name,title,tags,avatar_url,creator_username",
                 "per_page": len(chunk),
                 "page": 1,
@@ -275,7 +271,7 @@ def fetch_typesense_bot_details_by_ids(bot_ids: List[str]) -> Dict[str, dict]:
             }]
         }
 
-        result = multi_search_request(payload)
+    for _chunk, result in search_id_chunks(bot_ids, build_payload):
         results = (result or {}).get("results", [])
         hits = results[0].get("hits", []) if results else []
 
@@ -36,10 +36,18 @@ LAST_SNAPSHOT_DATE = None
 TYPESENSE_HOST = "https://etmzpxgvnid370fyp.a1.typesense.net"
 TYPESENSE_KEY = "STHKtT6jrC5z1IozTJHIeSN4qN9oL1s3"  # Public read key used by web UI
 TYPESENSE_SEARCH_ENDPOINT = f"{TYPESENSE_HOST}/multi_search"
+# Max concurrent chunk lookups against Typesense (keep low to avoid 429s)
+TYPESENSE_MAX_WORKERS = max(1, int(os.environ.get("TS_MAX_WORKERS", "8")))
+# IDs per by-ID lookup request (Typesense caps per_page at 250)
+TYPESENSE_ID_CHUNK = max(1, min(250, int(os.environ.get("TS_CHUNK_SIZE", "200"))))
+# Gzip large request bodies (opt-in; disabled automatically if the server rejects it)
+TYPESENSE_GZIP_REQUESTS = os.environ.get("TS_GZIP_REQUESTS", "").lower() in ("1", "true", "yes")
 
 # Different cache files for filtered vs unfiltered
 FILTERED_CACHE = DATA_DIR / "ts_filtered_480.json"
 UNFILTERED_CACHE = DATA_DIR / "ts_unfiltered_480.json"
+# Pretty-print cache files (debugging only; compact is smaller and faster)
+TS_CACHE_PRETTY = os.environ.get("TS_CACHE_PRETTY", "").lower() in ("1", "true", "yes")
 
 ALLOWED_FIELDS = [
     "date", "bot_id", "bot_name", "bot_title",
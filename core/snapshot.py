@@ -27,8 +27,7 @@ from .helpers import (
 )
 from .typesense_client import (
     fetch_typesense_top_bots,
-    fetch_typesense_tags_for_bot_ids,
-    fetch_typesense_ratings_for_bot_ids,
+    fetch_typesense_tags_and_ratings_for_bot_ids,
 )
 from .authors_service import refresh_tracked_authors_snapshot
 
@@ -166,24 +165,30 @@ def take_snapshot(args=None, verbose=True):
     except Exception as e:
         logging.error(f"Error saving rank history: {e}")
 
-    # Cache tags for "My Chatbots"
+    # Fetch tags + ratings for "My Chatbots" in one pass
     try:
         your_ids = [str(r["bot_id"]) for r in rows_clean]
-        tag_map = fetch_typesense_tags_for_bot_ids(your_ids)
-        save_cached_tag_map(tag_map)
-        safe_log(f"Cached tags for {len(tag_map)} bots (My Chatbots)")
+        tag_map, rating_map = fetch_typesense_tags_and_ratings_for_bot_ids(your_ids)
     except Exception as e:
-        safe_log(f"Tag caching failed: {e}")
+        safe_log(f"Tag/rating fetch failed: {e}")
+        tag_map, rating_map = None, None
+
+    # Cache tags for "My Chatbots"
+    if tag_map is not None:
+        try:
+            save_cached_tag_map(tag_map)
+            safe_log(f"Cached tags for {len(tag_map)} bots (My Chatbots)")
+        except Exception as e:
+            safe_log(f"Tag caching failed: {e}")
 
     # Cache ratings for "My Chatbots" + rating history
-    try:
-        your_ids = [str(r["bot_id"]) for r in rows_clean]
-        rating_map = fetch_typesense_ratings_for_bot_ids(your_ids)
-        save_cached_rating_map(rating_map)
-        save_rating_history_for_date(stamp, rating_map)
-        safe_log(f"Cached ratings for {len(rating_map)} bots (My Chatbots)")
-    except Exception as e:
-        safe_log(f"Rating caching failed: {e}")
+    if rating_map is not None:
+        try:
+            save_cached_rating_map(rating_map)
+            save_rating_history_for_date(stamp, rating_map)
+            safe_log(f"Cached ratings for {len(rating_map)} bots (My Chatbots)")
+        except Exception as e:
+            safe_log(f"Rating caching failed: {e}")
 
     # Track Authors (snapshot cache)
     try:
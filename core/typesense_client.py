@@ -1,15 +1,31 @@
+import functools
+import gzip
 import json
 import logging
+import pickle
+import random
+import re
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
 from .config import (
     TYPESENSE_KEY,
     TYPESENSE_SEARCH_ENDPOINT,
+    TYPESENSE_MAX_WORKERS,
+    TYPESENSE_ID_CHUNK,
+    TYPESENSE_GZIP_REQUESTS,
     FILTERED_CACHE,
     UNFILTERED_CACHE,
+    TS_CACHE_PRETTY,
 )
 from .logging_utils import safe_log
 from .helpers import rating_to_pct
@@ -17,90 +33,311 @@ from .helpers import rating_to_pct
 
 # ------------------ Typesense client + trending ------------------
 
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Shared keep-alive session so repeated chunked calls reuse one connection
+# instead of paying a fresh TCP+TLS handshake per POST.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.headers.update({
+    "X-TYPESENSE-API-KEY": TYPESENSE_KEY,
+    "Content-Type": "application/json",
+    "Connection": "keep-alive",
+})
+
+# Request bodies above this size are gzipped when TYPESENSE_GZIP_REQUESTS is on.
+_GZIP_MIN_BYTES = 1024
+# Flipped to False (never back) by multi_search_request on a 415. Written from the
+# multi_search_many pool threads without a lock on purpose: a one-way bool store is
+# atomic, and the worst race is a few extra gzipped requests that each fall back.
+_gzip_requests = TYPESENSE_GZIP_REQUESTS
+
+
+# Upper bound on a server-requested Retry-After wait; callers sit behind Flask requests.
+_MAX_RETRY_AFTER_SECONDS = 30
+
+
+def _retry_after_seconds(response, default: float) -> float:
+    """
+    Seconds to wait per the server's Retry-After header (delta-seconds form),
+    or `default` if it is missing or unparseable.
+    """
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
+
+
 def multi_search_request(payload: dict) -> dict:
     """
     Wrapper for Typesense's multi_search endpoint using your public API key.
     Guaranteed to always return a dict (or {}), never None.
     """
-    headers = {
-        "X-TYPESENSE-API-KEY": TYPESENSE_KEY,
-        "Content-Type": "application/json",
-    }
+    return _multi_search_with_status(payload)[0]
+
 
-    for attempt in range(3):
+def _multi_search_with_status(payload: dict) -> Tuple[dict, Optional[int]]:
+    """
+    multi_search_request, plus the HTTP status of the last failed attempt
+    (None on success or when no HTTP response was received).
+    """
+    global _gzip_requests
+    last_status = None
+
+    # Encode once; the session already carries the API key + Content-Type headers.
+    raw_body = _json_dumps(payload)
+    body, headers = raw_body, None
+    if _gzip_requests and len(raw_body) > _GZIP_MIN_BYTES:
+        body, headers = gzip.compress(raw_body), {"Content-Encoding": "gzip"}
+
+    attempts = 3
+    for attempt in range(attempts):
+        # Default backoff for 5xx / network errors; branches below may override it
+        delay = min(8, 2**attempt) + random.uniform(0, 0.5)
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 TYPESENSE_SEARCH_ENDPOINT,
+                data=body,
                 headers=headers,
-                data=json.dumps(payload),
                 timeout=25,
             )
             response.raise_for_status()
 
             try:
-                data = response.json()
-                return data if isinstance(data, dict) else {}
+                data = _json_loads(response.content)
+                return (data if isinstance(data, dict) else {}), None
             except Exception as e:
                 logging.error(
                     f"[Typesense] Invalid JSON response: {e}. "
                     f"Text: {response.text[:500]}"
                 )
-                return {}
+                return {}, None
 
         except requests.exceptions.HTTPError as e:
-            if getattr(e, "response", None) and e.response.status_code == 429:
-                time.sleep(2**attempt)
-            else:
-                time.sleep(2)
+            # NB: Response.__bool__ is False for error statuses, so test for None explicitly
+            resp = getattr(e, "response", None)
+            status = resp.status_code if resp is not None else None
+            last_status = status
+            if headers and status == 415:
+                logging.warning("[Typesense] HTTP 415 on gzipped body; disabling request compression")
+                _gzip_requests = False
+                body, headers = raw_body, None
+                delay = 0
+            elif status == 429:
+                retry_after = min(_retry_after_seconds(resp, 2**attempt), _MAX_RETRY_AFTER_SECONDS)
+                delay = retry_after + random.uniform(0, 0.5)
+            elif status is not None and 400 <= status < 500:
+                logging.error(f"[Typesense] HTTP {status}, not retrying: {e}")
+                return {}, status
         except requests.exceptions.RequestException:
-            time.sleep(2)
+            last_status = None
         except Exception:
-            time.sleep(2)
+            last_status = None
+
+        # No point sleeping after the final attempt
+        if attempt < attempts - 1:
+            time.sleep(delay)
 
     logging.error("[Typesense] All attempts failed → using empty fallback {}.")
-    return {}
+    return {}, last_status
 
 
-def fetch_typesense_tags_for_bot_ids(bot_ids: List[str]) -> Dict[str, List[str]]:
+def _run_concurrently(fn, payloads: List[dict]) -> list:
+    if not payloads:
+        return []
+    if len(payloads) == 1:
+        return [fn(payloads[0])]
+
+    workers = min(TYPESENSE_MAX_WORKERS, len(payloads))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ts-search") as pool:
+        return list(pool.map(fn, payloads))
+
+
+def multi_search_many(payloads: List[dict]) -> List[dict]:
     """
-    Fetch tags for specific bot IDs from Typesense, regardless of rank/top480.
-    Returns: { "bot_id": ["tag1", "tag2", ...] }
+    Run several independent multi_search payloads concurrently.
+    Results are returned in the same order as `payloads`.
     """
-    bot_ids = [str(x) for x in bot_ids if x]
-    if not bot_ids:
-        return {}
+    return _run_concurrently(multi_search_request, payloads)
 
-    tag_map: Dict[str, List[str]] = {}
-    CHUNK = 80
 
-    for i in range(0, len(bot_ids), CHUNK):
-        chunk = bot_ids[i:i + CHUNK]
-        ids_json = json.dumps(chunk)
+# In-band 400/422 error texts that point at an oversized request.
+_SIZE_ERROR_RE = re.compile(r"too (long|large|many)|exceed|maximum|limit", re.IGNORECASE)
 
-        payload = {
+
+def _chunk_too_large(result: dict, status: Optional[int]) -> bool:
+    """
+    True if a by-ID search failed in a way a smaller chunk could fix:
+    HTTP 413, or an in-band per-search error that is size related.
+    Outages, 429s, timeouts and in-band 401/403/404 (scope, missing
+    collection/field) are not retried this way.
+    """
+    if status == 413:
+        return True
+    results = (result or {}).get("results") or []
+    first = results[0] if results and isinstance(results[0], dict) else {}
+    if "error" not in first:
+        return False
+
+    code = first.get("code")
+    if code == 413:
+        return True
+    return code in (400, 422) and bool(_SIZE_ERROR_RE.search(str(first.get("error") or "")))
+
+
+def search_id_chunks(ids: List[str], build_payload) -> List[tuple]:
+    """
+    Split `ids` into TYPESENSE_ID_CHUNK-sized chunks and search them concurrently.
+    A chunk rejected as too large (see _chunk_too_large) is retried once as two halves.
+    Returns: [(chunk, result), ...]
+    """
+    chunks = [ids[i:i + TYPESENSE_ID_CHUNK] for i in range(0, len(ids), TYPESENSE_ID_CHUNK)]
+    responses = _run_concurrently(_multi_search_with_status, [build_payload(c) for c in chunks])
+
+    out = []
+    for chunk, (result, status) in zip(chunks, responses):
+        if len(chunk) < 2 or not _chunk_too_large(result, status):
+            out.append((chunk, result))
+            continue
+
+        mid = len(chunk) // 2
+        halves = [chunk[:mid], chunk[mid:]]
+        safe_log(f"[Typesense] chunk of {len(chunk)} ids rejected; retrying as {mid} + {len(chunk) - mid}")
+        out.extend(zip(halves, multi_search_many([build_payload(h) for h in halves])))
+    return out
+
+
+# Character IDs are plain tokens, so they can go into filter_by unquoted.
+_PLAIN_ID_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def character_id_filter(ids: List[str]) -> str:
+    """
+    Build a `character_id:=[...]` filter_by clause for a list of IDs.
+    Falls back to a JSON-quoted list if any ID is not a plain token.
+    """
+    if all(_PLAIN_ID_RE.fullmatch(x) for x in ids):
+        return "character_id:=[" + ",".join(ids) + "]"
+    return f"character_id:={_json_dumps(ids).decode('utf-8')}"
+
+
+# Constant parts of the by-ID lookup searches; only filter_by/per_page vary per chunk.
+_FIELDS_SEARCH_TEMPLATE = {
+    "collection": "public_characters_alias",
+    "q": "*",
+    "query_by": "name,title,tags,character_id",
+    "page": 1,
+    "highlight_fields": "none",
+    "enable_highlight_v1": False,
+}
+
+_CREATED_AT_SEARCH_TEMPLATE = {
+    "q": "*",
+    "query_by": "character_id",
+    "include_fields": "character_id,created_at",
+    "page": 1,
+    "highlight_fields": "none",
+    "enable_highlight_v1": False,
+}
+
+
+def _normalize_bot_ids(bot_ids) -> List[str]:
+    """Stringify, drop empty and de-duplicate IDs (first-seen order kept)."""
+    return list(dict.fromkeys(str(x) for x in (bot_ids or []) if x))
+
+
+def fetch_typesense_fields_for_bot_ids(
+    bot_ids: List[str],
+    fields=("tags", "rating_score", "created_at"),
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch several document fields for specific bot IDs in one round trip per chunk.
+    Every hit bot_id gets an entry per field (None if the field is missing).
+    Returns: { field: { "bot_id": raw_value } }
+    """
+    fields = tuple(fields)
+    out: Dict[str, Dict[str, Any]] = {f: {} for f in fields}
+
+    bot_ids = _normalize_bot_ids(bot_ids)
+    if not bot_ids or not fields:
+        return out
+
+    template = {
+        **_FIELDS_SEARCH_TEMPLATE,
+        "include_fields": ",".join(("character_id",) + fields),
+    }
+
+    def build_payload(chunk: List[str]) -> dict:
+        return {
             "searches": [{
-                "collection": "public_characters_alias",
-                "q": "*",
-                "query_by": "name,title,tags,character_id",
-                "filter_by": f"character_id:={ids_json}",
-                "include_fields": "character_id,tags",
+                **template,
+                "filter_by": character_id_filter(chunk),
                 "per_page": len(chunk),
-                "page": 1,
-                "highlight_fields": "none",
-                "enable_highlight_v1": False,
             }]
         }
 
-        result = multi_search_request(payload)
+    for _chunk, result in search_id_chunks(bot_ids, build_payload):
         results = (result or {}).get("results", [])
         hits = results[0].get("hits", []) if results else []
 
         for h in hits:
             doc = (h or {}).get("document") or {}
             cid = str(doc.get("character_id") or "")
-            if cid:
-                tag_map[cid] = doc.get("tags") or []
+            if not cid:
+                continue
+            for f in fields:
+                out[f][cid] = doc.get(f)
+
+    return out
+
+
+def _tags_from_raw(raw: Dict[str, Any]) -> Dict[str, List[str]]:
+    return {cid: (v or []) for cid, v in raw.items()}
+
+
+def _ratings_from_raw(raw: Dict[str, Any]) -> Dict[str, float | None]:
+    rating_map: Dict[str, float | None] = {}
+    for cid, rs in raw.items():
+        try:
+            rating_map[cid] = float(rs) if rs is not None else None
+        except Exception:
+            rating_map[cid] = None
+    return rating_map
+
+
+def fetch_typesense_tags_and_ratings_for_bot_ids(bot_ids: List[str]):
+    """
+    Fetch tags and rating_score together (one request per chunk).
+    Returns: ({ "bot_id": [tags...] }, { "bot_id": float or None })
+    """
+    bot_ids = _normalize_bot_ids(bot_ids)
+    raw = fetch_typesense_fields_for_bot_ids(bot_ids, fields=("tags", "rating_score"))
+    tag_map = _tags_from_raw(raw["tags"])
+    rating_map = _ratings_from_raw(raw["rating_score"])
+    safe_log(f"Tags+Ratings: fetched {len(tag_map)} / {len(bot_ids)} bot_ids from Typesense")
+    return tag_map, rating_map
+
 
+def fetch_typesense_tags_for_bot_ids(bot_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Fetch tags for specific bot IDs from Typesense, regardless of rank/top480.
+    Returns: { "bot_id": ["tag1", "tag2", ...] }
+    """
+    bot_ids = _normalize_bot_ids(bot_ids)
+    raw = fetch_typesense_fields_for_bot_ids(bot_ids, fields=("tags",))
+    tag_map = _tags_from_raw(raw["tags"])
     safe_log(f"Tags: fetched tags for {len(tag_map)} / {len(bot_ids)} bot_ids from Typesense")
     return tag_map
 
@@ -110,70 +347,173 @@ def fetch_typesense_ratings_for_bot_ids(bot_ids: List[str]) -> Dict[str, float o
     Fetch rating_score for specific bot IDs from Typesense.
     Returns: { "bot_id": float or None }
     """
-    bot_ids = [str(x) for x in bot_ids if x]
-    if not bot_ids:
-        return {}
-
-    rating_map: Dict[str, float | None] = {}
-    CHUNK = 80
+    bot_ids = _normalize_bot_ids(bot_ids)
+    raw = fetch_typesense_fields_for_bot_ids(bot_ids, fields=("rating_score",))
+    rating_map = _ratings_from_raw(raw["rating_score"])
+    safe_log(f"Ratings: fetched ratings for {len(rating_map)} / {len(bot_ids)} bot_ids from Typesense")
+    return rating_map
 
-    for i in range(0, len(bot_ids), CHUNK):
-        chunk = bot_ids[i:i + CHUNK]
-        ids_json = json.dumps(chunk)
 
-        payload = {
-            "searches": [{
-                "collection": "public_characters_alias",
-                "q": "*",
-                "query_by": "name,title,tags,character_id",
-                "filter_by": f"character_id:={ids_json}",
-                "include_fields": "character_id,rating_score",
-                "per_page": len(chunk),
-                "page": 1,
-                "highlight_fields": "none",
-                "enable_highlight_v1": False,
-            }]
-        }
-
-        result = multi_search_request(payload)
-        results = (result or {}).get("results", [])
-        hits = results[0].get("hits", []) if results else []
+class TopBot:
+    """
+    One trending bot from fetch_typesense_top_bots.
+    Slotted to avoid a per-instance __dict__; also supports the dict-style
+    access (bot["x"], bot.get("x"), "x" in bot) that routes and templates use.
+    """
+    __slots__ = (
+        "character_id", "name", "title", "num_messages", "num_messages_24h",
+        "avatar_url", "creator_username", "creator_user_id", "tags", "is_nsfw",
+        "link", "page", "rank", "rating_score", "rating_pct",
+    )
 
-        for h in hits:
-            doc = (h or {}).get("document") or {}
-            cid = str(doc.get("character_id") or "")
-            rs = doc.get("rating_score", None)
-            if cid:
-                try:
-                    rating_map[cid] = float(rs) if rs is not None else None
-                except Exception:
-                    rating_map[cid] = None
+    # Explicit parameters: unknown or missing field names raise TypeError, and
+    # positional construction from cached tuples stays cheap on the cache-hit path.
+    def __init__(
+        self, character_id, name, title, num_messages, num_messages_24h,
+        avatar_url, creator_username, creator_user_id, tags, is_nsfw,
+        link, page, rank, rating_score, rating_pct,
+    ):
+        self.character_id = character_id
+        self.name = name
+        self.title = title
+        self.num_messages = num_messages
+        self.num_messages_24h = num_messages_24h
+        self.avatar_url = avatar_url
+        self.creator_username = creator_username
+        self.creator_user_id = creator_user_id
+        self.tags = tags
+        self.is_nsfw = is_nsfw
+        self.link = link
+        self.page = page
+        self.rank = rank
+        self.rating_score = rating_score
+        self.rating_pct = rating_pct
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return iter(self.__slots__)
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"TopBot({self.to_dict()!r})"
+
+
+# Single background writer so cache writes never block the caller
+# and never race each other on the same file.
+_CACHE_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ts-cache")
+
+
+def _binary_cache_path(cache_file):
+    return cache_file.with_suffix(".pkl")
+
+
+def _cache_sources(cache_file) -> List[Any]:
+    """
+    Cache files to try, best first: the pickle sibling when it is at least as
+    new as the JSON, then the JSON itself.
+    The JSON is authoritative: deleting it forces a refetch, so an orphaned
+    pickle is removed rather than served.
+    """
+    bin_file = _binary_cache_path(cache_file)
+    if not cache_file.exists():
+        if bin_file.exists():
+            try:
+                bin_file.unlink()
+            except OSError as e:
+                safe_log(f"Failed removing orphaned Typesense cache {bin_file}: {e}")
+        return []
 
-    safe_log(f"Ratings: fetched ratings for {len(rating_map)} / {len(bot_ids)} bot_ids from Typesense")
-    return rating_map
+    sources = []
+    if bin_file.exists() and bin_file.stat().st_mtime_ns >= cache_file.stat().st_mtime_ns:
+        sources.append(bin_file)
+    sources.append(cache_file)
+    return sources
 
 
-def fetch_typesense_top_bots(max_pages: int = 10, use_cache: bool = True, filter_female_nsfw: bool = True) -> Dict[str, dict]:
+def _write_cache(cache_file, bots: List[dict]) -> None:
+    """
+    Serialize `bots` to `cache_file` via a temp file + rename, so the
+    cache-read path never sees a half-written file.
+    """
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_bytes(_json_dumps(bots, indent=TS_CACHE_PRETTY))
+        tmp.replace(cache_file)
+
+        # Binary sibling for fast reloads; written last so it is the newer file
+        bin_file = _binary_cache_path(cache_file)
+        bin_tmp = bin_file.with_suffix(".pkl.tmp")
+        bin_tmp.write_bytes(pickle.dumps(bots, protocol=pickle.HIGHEST_PROTOCOL))
+        bin_tmp.replace(bin_file)
+        safe_log(f"Saved {len(bots)} bots to Typesense cache: {cache_file}")
+
+        # A tag map built from the previous file may have been cached while
+        # this write was pending; drop it now that the new file is in place.
+        if cache_file == UNFILTERED_CACHE:
+            invalidate_tag_map()
+    except Exception as e:
+        safe_log(f"Failed writing Typesense cache: {e}")
+
+
+@functools.lru_cache(maxsize=4)
+def _load_cached_top_bots(cache_path: str, cache_mtime_ns: int) -> Optional[Dict[str, tuple]]:
+    """
+    Parse a top-bots cache file once per (path, mtime); rewrites invalidate it.
+    Each bot is kept as a tuple in TopBot.__slots__ order for cheap TopBot(*values).
+    Returns None if the file does not look like a top-bots cache.
+    """
+    with open(cache_path, "rb") as f:
+        raw = f.read()
+    cached = pickle.loads(raw) if cache_path.endswith(".pkl") else _json_loads(raw)
+    # Trusted file written by _write_cache: spot-check the first entry only.
+    # A malformed later entry raises KeyError below and the caller refetches.
+    if isinstance(cached, list) and (not cached or "character_id" in cached[0]):
+        # Written by _write_cache, so character_id is already a str
+        return {b["character_id"]: tuple(b[key] for key in TopBot.__slots__) for b in cached}
+    return None
+
+
+def fetch_typesense_top_bots(max_pages: int = 10, use_cache: bool = True, filter_female_nsfw: bool = True) -> Dict[str, TopBot]:
     """
     Fetch Top Bots from Typesense.
     Supports:
       - filtered mode (Female + NSFW only)
       - unfiltered mode (all STANDARD spicychat characters)
+    Returns: { bot_id: TopBot } (same records whether served from cache or live)
     """
     cache_file = FILTERED_CACHE if filter_female_nsfw else UNFILTERED_CACHE
 
     # ----- CACHE READ -----
-    if use_cache and cache_file.exists():
+    for source in (_cache_sources(cache_file) if use_cache else []):
         try:
-            cached = json.loads(cache_file.read_text(encoding="utf-8"))
-            if isinstance(cached, list) and all("character_id" in b for b in cached):
-                safe_log(f"Loaded {len(cached)} bots from cache: {cache_file}")
-                return {str(b["character_id"]): b for b in cached}
+            cached = _load_cached_top_bots(str(source), source.stat().st_mtime_ns)
+            if cached is not None:
+                safe_log(f"Loaded {len(cached)} bots from cache: {source}")
+                # Fresh records per call: callers normalize fields in place
+                return {cid: TopBot(*values) for cid, values in cached.items()}
         except Exception as e:
-            safe_log(f"Failed reading cached Typesense results: {e}")
+            safe_log(f"Failed reading cached Typesense results from {source}: {e}")
 
     safe_log("Fetching fresh Top Bots from Typesense...")
-    ALL_RESULTS: List[dict] = []
+    ALL_RESULTS_MAP: Dict[str, TopBot] = {}
     page = 1
     per_page = 48
 
@@ -224,34 +564,34 @@ def fetch_typesense_top_bots(max_pages: int = 10, use_cache: bool = True, filter
         if not hits:
             break
 
-        safe_log(f"Page {page}: Fetched {len(hits)} hits")
+        logging.debug("Page %d: Fetched %d hits", page, len(hits))
 
         for obj in hits:
             doc: dict = obj.get("document") or {}
             cid = str(doc.get("character_id") or "").strip()
-            if not cid:
+            if not cid or cid in ALL_RESULTS_MAP:
                 continue
 
-            rank = len(ALL_RESULTS) + 1
-
-            bot = {
-                "character_id": cid,
-                "name": (doc.get("name") or "").strip(),
-                "title": doc.get("title") or "",
-                "num_messages": doc.get("num_messages", 0) or 0,
-                "num_messages_24h": doc.get("num_messages_24h", 0) or 0,
-                "avatar_url": doc.get("avatar_url") or "",
-                "creator_username": doc.get("creator_username") or "",
-                "creator_user_id": doc.get("creator_user_id") or "",
-                "tags": doc.get("tags", []) or [],
-                "is_nsfw": bool(doc.get("is_nsfw", False)),
-                "link": f"https://spicychat.ai/chat/{cid}",
-                "page": page,
-                "rank": rank,
-                "rating_score": doc.get("rating_score", None),
-                "rating_pct": rating_to_pct(doc.get("rating_score", None)),
-            }
-            ALL_RESULTS.append(bot)
+            rank = len(ALL_RESULTS_MAP) + 1
+
+            bot = TopBot(
+                character_id=cid,
+                name=(doc.get("name") or "").strip(),
+                title=doc.get("title") or "",
+                num_messages=doc.get("num_messages", 0) or 0,
+                num_messages_24h=doc.get("num_messages_24h", 0) or 0,
+                avatar_url=doc.get("avatar_url") or "",
+                creator_username=doc.get("creator_username") or "",
+                creator_user_id=doc.get("creator_user_id") or "",
+                tags=doc.get("tags", []) or [],
+                is_nsfw=bool(doc.get("is_nsfw", False)),
+                link=f"https://spicychat.ai/chat/{cid}",
+                page=page,
+                rank=rank,
+                rating_score=doc.get("rating_score", None),
+                rating_pct=rating_to_pct(doc.get("rating_score", None)),
+            )
+            ALL_RESULTS_MAP[cid] = bot
 
         if len(hits) < per_page:
             break
@@ -259,34 +599,60 @@ def fetch_typesense_top_bots(max_pages: int = 10, use_cache: bool = True, filter
         page += 1
 
     # ----- CACHE WRITE -----
-    if ALL_RESULTS:
-        try:
-            cache_file.parent.mkdir(parents=True, exist_ok=True)
-            cache_file.write_text(json.dumps(ALL_RESULTS, indent=2), encoding="utf-8")
-            safe_log(f"Saved {len(ALL_RESULTS)} bots to Typesense cache: {cache_file}")
-        except Exception as e:
-            safe_log(f"Failed writing Typesense cache: {e}")
+    if ALL_RESULTS_MAP:
+        if not filter_female_nsfw:
+            _store_tag_map(_build_tag_map(ALL_RESULTS_MAP))
+        _CACHE_WRITER.submit(
+            _write_cache, cache_file, [b.to_dict() for b in ALL_RESULTS_MAP.values()]
+        )
+
+    return ALL_RESULTS_MAP
 
-    return {str(b["character_id"]): b for b in ALL_RESULTS}
+
+# (built_at monotonic time, tag_map) from the last get_typesense_tag_map() call
+_TAG_MAP_CACHE: Optional[Tuple[float, Dict[str, List[str]]]] = None
+_TAG_MAP_TTL_SECONDS = 300
+
+
+def invalidate_tag_map() -> None:
+    """Drop the in-process tag map so the next call rebuilds it."""
+    global _TAG_MAP_CACHE
+    _TAG_MAP_CACHE = None
+
+
+def _build_tag_map(ts_map) -> Dict[str, List[str]]:
+    tag_map: Dict[str, List[str]] = {}
+    for cid, bot in (ts_map or {}).items():
+        tags = bot.get("tags") or []
+        if tags:
+            tag_map[str(cid)] = tags
+    return tag_map
+
+
+def _store_tag_map(tag_map: Dict[str, List[str]]) -> None:
+    # Never cache an empty map (e.g. Typesense down) so the next call retries
+    global _TAG_MAP_CACHE
+    _TAG_MAP_CACHE = (time.monotonic(), tag_map) if tag_map else None
 
 
 def get_typesense_tag_map() -> Dict[str, List[str]]:
     """
     Build a tag map from the UNFILTERED cached (or live) Typesense top bots.
+    Reuses the previous result for up to _TAG_MAP_TTL_SECONDS.
     Returns: { bot_id: [tags...] }
     """
+    cached = _TAG_MAP_CACHE
+    if cached and time.monotonic() - cached[0] < _TAG_MAP_TTL_SECONDS:
+        return cached[1]
+
     ts_map = fetch_typesense_top_bots(max_pages=10, use_cache=True, filter_female_nsfw=False)
     if not ts_map:
         safe_log("Tags: unfiltered TS cache empty — fetching live once to build tag_map")
         ts_map = fetch_typesense_top_bots(max_pages=10, use_cache=False, filter_female_nsfw=False)
 
-    tag_map: Dict[str, List[str]] = {}
-    for cid, bot in (ts_map or {}).items():
-        tags = bot.get("tags") or []
-        if tags:
-            tag_map[str(cid)] = tags
-
+    tag_map = _build_tag_map(ts_map)
     safe_log(f"Tags: built tag_map for {len(tag_map)} bots")
+    _store_tag_map(tag_map)
     return tag_map
 import json
 
@@ -301,14 +667,12 @@ def fetch_typesense_created_at_for_bot_ids(
     Returns:
         { bot_id: raw_created_at }
     """
-    bot_ids = [str(x) for x in (bot_ids or []) if x]
+    bot_ids = _normalize_bot_ids(bot_ids)
     if not bot_ids:
         safe_log("[TS created_at] no bot_ids provided")
         return {}
 
     out = {}
-    CHUNK = 80
-
     safe_log(f"[TS created_at] lookup start for {len(bot_ids)} bot_ids")
 
     for coll in collections:
@@ -321,39 +685,32 @@ def fetch_typesense_created_at_for_bot_ids(
             f"for {len(remaining)} remaining ids"
         )
 
-        for i in range(0, len(remaining), CHUNK):
-            chunk = remaining[i:i + CHUNK]
-            ids_json = json.dumps(chunk)
+        template = {**_CREATED_AT_SEARCH_TEMPLATE, "collection": coll}
 
-            payload = {
+        def build_payload(chunk: List[str]) -> dict:
+            return {
                 "searches": [{
-                    "collection": coll,
-                    "q": "*",
-                    "query_by": "character_id",
-                    "filter_by": f"character_id:={ids_json}",
-                    "include_fields": "character_id,created_at",
+                    **template,
+                    "filter_by": character_id_filter(chunk),
                     "per_page": len(chunk),
-                    "page": 1,
-                    "highlight_fields": "none",
-                    "enable_highlight_v1": False,
                 }]
             }
 
-            result = multi_search_request(payload)
+        for idx, (chunk, result) in enumerate(search_id_chunks(remaining, build_payload)):
             results = (result or {}).get("results", [])
             hits = results[0].get("hits", []) if results else []
 
-            safe_log(
-                f"[TS created_at] coll='{coll}' "
-                f"chunk={i//CHUNK + 1} "
-                f"ids={len(chunk)} hits={len(hits)}"
+            # Per-chunk detail at DEBUG; %-args defer formatting until it is emitted
+            logging.debug(
+                "[TS created_at] coll='%s' chunk=%d ids=%d hits=%d",
+                coll, idx + 1, len(chunk), len(hits),
             )
 
             # Log schema once per collection
-            if hits and not out:
+            if hits and not out and logging.getLogger().isEnabledFor(logging.DEBUG):
                 doc0 = (hits[0] or {}).get("document") or {}
-                safe_log(
-                    f"[TS created_at] coll='{coll}' document keys={list(doc0.keys())}"
+                logging.debug(
+                    "[TS created_at] coll='%s' document keys=%s", coll, list(doc0.keys())
                 )
 
             for h in hits: